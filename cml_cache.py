@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+CACHE_DIR = os.path.expanduser("~/.cache/cml-metrics")
+
+# Pass --no-cache to always hit the API; pass --cache-fallback to serve a
+# stale cached response when the API call raises.
+NO_CACHE = "--no-cache" in sys.argv
+CACHE_FALLBACK = "--cache-fallback" in sys.argv
+
+PROJECTS_TTL = 3600
+JOBS_TTL = 3600
+RUNS_TTL = 300
+
+PAGE_SIZE = 100
+
+# Function to walk a paginated list endpoint page by page
+def paged(fn, items_attr, **kwargs):
+    page_token = None
+    while True:
+        resp = fn(page_size=PAGE_SIZE, page_token=page_token, **kwargs)
+        yield from getattr(resp, items_attr)
+        page_token = getattr(resp, "next_page_token", None)
+        if not page_token:
+            break
+
+_MISSING = object()
+
+# Function to load a pickled cache entry, treating a corrupt or truncated
+# file as a miss instead of aborting the run
+def _load(path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return _MISSING
+
+# Function to write a cache file atomically: an interrupted or concurrent
+# run never leaves a fresh-looking half-written entry behind
+def _atomic_write(path, write, mode="wb"):
+    with tempfile.NamedTemporaryFile(mode=mode, dir=CACHE_DIR, delete=False) as tmp:
+        write(tmp)
+        tmp_name = tmp.name
+    os.replace(tmp_name, path)
+
+# Function to wrap a client list call with a TTL'd disk cache
+def cached(fn, ttl, api_version=""):
+    def wrapper(**kwargs):
+        if NO_CACHE:
+            return fn(**kwargs)
+
+        key = hashlib.sha256(repr((fn.__name__, sorted(kwargs.items()))).encode()).hexdigest()
+        path = os.path.join(CACHE_DIR, key + ".pkl")
+
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+            resp = _load(path)
+            if resp is not _MISSING:
+                return resp
+
+        try:
+            resp = fn(**kwargs)
+        except Exception:
+            if CACHE_FALLBACK and os.path.exists(path):
+                stale = _load(path)
+                if stale is not _MISSING:
+                    return stale
+            raise
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _atomic_write(path, lambda f: pickle.dump(resp, f))
+        _atomic_write(path[:-len(".pkl")] + ".json", lambda f: json.dump({
+            "endpoint": fn.__name__,
+            "args": {k: str(v) for k, v in sorted(kwargs.items())},
+            "cached_at": time.time(),
+            "api_version": api_version,
+        }, f), mode="w")
+        return resp
+
+    return wrapper
@@ -1,120 +1,103 @@
 import cmlapi
 from cmlapi.rest import ApiException
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cml_cache import cached, paged, PROJECTS_TTL, JOBS_TTL
 
 client = cmlapi.default_client(url=os.getenv("CDSW_API_URL").replace("/api/v1", ""), cml_api_key=os.getenv("CDSW_APIV2_KEY"))
 
+# Size the urllib3 pool for the worker threads so requests reuse keep-alive
+# connections instead of paying a TCP+TLS handshake each
+client.api_client.rest_client.pool_manager.connection_pool_kw.update(maxsize=64, block=False)
+
+_api_version = getattr(cmlapi, "__version__", "")
+list_projects = cached(client.list_projects, PROJECTS_TTL, api_version=_api_version)
+list_jobs = cached(client.list_jobs, JOBS_TTL, api_version=_api_version)
+list_applications = cached(client.list_applications, JOBS_TTL, api_version=_api_version)
+list_models = cached(client.list_models, JOBS_TTL, api_version=_api_version)
+
+MAX_WORKERS = 16
+RESOURCE_KEYS = ("cpu", "memory", "gpu")
+
 # Function to get resource consumption for all jobs
 def get_job_resources(project_id):
-        project = client.get_project(project_id=project_id)
-        jobs = client.list_jobs(project_id=project_id, page_size=1000).jobs
-        
-        resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
-        
+        jobs = paged(list_jobs, "jobs", project_id=project_id)
+
+        cpu = memory = gpu = 0
         for job in jobs:
-            try:
-                resources["cpu"] += job.cpu
-                resources["memory"] += job.memory
-                resources["gpu"] += job.nvidia_gpu
-            except AttributeError as e:
-                print(f"Error processing job {job}: {e}")
-        return resources
+            cpu += getattr(job, "cpu", 0) or 0
+            memory += getattr(job, "memory", 0) or 0
+            gpu += getattr(job, "nvidia_gpu", 0) or 0
+        return {"cpu": cpu, "memory": memory, "gpu": gpu}
 
 # Function to get resource consumption for all applications
 def get_application_resources(project_id):
-        project = client.get_project(project_id=project_id)
-        applications = client.list_applications(project_id=project_id, page_size=1000).applications
-        
-        resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
+        applications = paged(list_applications, "applications", project_id=project_id)
         
+        cpu = memory = gpu = 0
         for application in applications:
-            try:
-                resources["cpu"] += application.cpu
-                resources["memory"] += application.memory
-                resources["gpu"] += application.nvidia_gpu
-            except AttributeError as e:
-                print(f"Error processing job {job}: {e}")
-        return resources
+            cpu += getattr(application, "cpu", 0) or 0
+            memory += getattr(application, "memory", 0) or 0
+            gpu += getattr(application, "nvidia_gpu", 0) or 0
+        return {"cpu": cpu, "memory": memory, "gpu": gpu}
     
 # Function to get resource consumption for all models
 def get_model_resources(project_id):
-        project = client.get_project(project_id=project_id)
-        models = client.list_models(project_id=project_id, page_size=1000).models
-        
-        resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
+        models = paged(list_models, "models", project_id=project_id)
         
+        # Sum in the API's native units (millicores / MB) and convert once at
+        # the end; scaling the total is the same as scaling every term
+        cpu_millicores = memory_mb = gpu = 0
         for model in models:
-            try:
-                resources["cpu"] += (int(model.default_resources.cpu_millicores) / 1000)
-                resources["memory"] += (int(model.default_resources.memory_mb) / 1024)
-                resources["gpu"] += int(model.default_resources.nvidia_gpus)
-            except AttributeError as e:
-                print(f"Error processing job {job}: {e}")
-        return resources
+            default_resources = getattr(model, "default_resources", None)
+            if default_resources is None:
+                continue
+            cpu_millicores += int(getattr(default_resources, "cpu_millicores", 0) or 0)
+            memory_mb += int(getattr(default_resources, "memory_mb", 0) or 0)
+            gpu += int(getattr(default_resources, "nvidia_gpus", 0) or 0)
+        return {"cpu": cpu_millicores / 1000, "memory": memory_mb / 1024, "gpu": gpu}
     
     
+# Function to fetch the three resource buckets for a single project
+# The job/application/model list calls are independent, so they run on a
+# small inner pool and the project costs one round-trip, not three
+def process_one_project(project):
+    project_id = project.id
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        job_future = executor.submit(get_job_resources, project_id)
+        app_future = executor.submit(get_application_resources, project_id)
+        model_future = executor.submit(get_model_resources, project_id)
+        return (job_future.result(), app_future.result(), model_future.result())
+
 # Function to aggregate resource consumption across all projects
 def aggregate_resources():
     try:
-        all_projects = client.list_projects(page_size=1000).projects
-        total_resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
-        total_job_resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
-        total_model_resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
-        total_app_resources = {
-            "cpu": 0,
-            "memory": 0,
-            "gpu": 0
-        }
-        
-        for project in all_projects:
-            project_id = project.id
-            
-            job_resources = get_job_resources(project_id)
-            if job_resources:
-                total_job_resources["cpu"] += job_resources["cpu"]
-                total_job_resources["memory"] += job_resources["memory"]
-                total_job_resources["gpu"] += job_resources["gpu"]
-            
-            application_resources = get_application_resources(project_id)
-            if application_resources:
-                total_app_resources["cpu"] += application_resources["cpu"]
-                total_app_resources["memory"] += application_resources["memory"]
-                total_app_resources["gpu"] += application_resources["gpu"]
-                
-            model_resources = get_model_resources(project_id)
-            if model_resources:
-                total_model_resources["cpu"] += model_resources["cpu"]
-                total_model_resources["memory"] += model_resources["memory"]
-                total_model_resources["gpu"] += model_resources["gpu"]
-            
+        all_projects = list(paged(list_projects, "projects"))
+
+        # Fetches for different projects overlap; the accumulation below is
+        # trivial compute and stays single-threaded
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = list(executor.map(process_one_project, all_projects))
+
+        # Single-pass reduction: each bucket is a (cpu, memory, gpu) vector
+        # summed element-wise, unpacked into named dicts only for printing
+        job_vec = [0, 0, 0]
+        app_vec = [0, 0, 0]
+        model_vec = [0, 0, 0]
+        for job_resources, application_resources, model_resources in results:
+            for vec, resources in ((job_vec, job_resources),
+                                   (app_vec, application_resources),
+                                   (model_vec, model_resources)):
+                if resources:
+                    for i, key in enumerate(RESOURCE_KEYS):
+                        vec[i] += resources[key]
+
+        total_job_resources = dict(zip(RESOURCE_KEYS, job_vec))
+        total_app_resources = dict(zip(RESOURCE_KEYS, app_vec))
+        total_model_resources = dict(zip(RESOURCE_KEYS, model_vec))
         # Aggregate total resources from jobs and applications
-        total_resources["cpu"] = total_job_resources["cpu"] + total_app_resources["cpu"]
-        total_resources["memory"] = total_job_resources["memory"] + total_app_resources["memory"]
-        total_resources["gpu"] = total_job_resources["gpu"] + total_app_resources["gpu"]
+        total_resources = dict(zip(RESOURCE_KEYS, (j + a for j, a in zip(job_vec, app_vec))))
 
         return total_job_resources, total_app_resources, total_model_resources, total_resources
     